@@ -1,15 +1,29 @@
 import sys
 import os
+import re
 from datetime import datetime
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QFileDialog, QLabel, 
-                            QTableWidget, QTableWidgetItem, QHeaderView,
-                            QGroupBox, QMessageBox, QProgressBar, QFrame)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject
-from PyQt6.QtGui import QFont
+                            QTableView, QHeaderView,
+                            QGroupBox, QMessageBox, QProgressBar, QFrame,
+                            QCheckBox)
+from PyQt6.QtCore import (Qt, QThread, pyqtSignal, QObject,
+                          QAbstractTableModel, QModelIndex,
+                          QThreadPool, QRunnable, QTimer)
+from PyQt6.QtGui import QFont, QBrush
 from PIL import Image
-from PIL.ExifTags import TAGS
 import struct
+import errno
+import threading
+import queue
+import hashlib
+import filecmp
+import time
+import mmap
+from functools import partial
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # 尝试导入HEIC支持
 try:
@@ -19,416 +33,775 @@ try:
 except ImportError:
     HEIC_SUPPORT = False
 
-class ExifWorker(QObject):
-    """EXIF数据提取工作线程"""
-    finished = pyqtSignal(list)
-    progress = pyqtSignal(int, int)  # current, total
-    error = pyqtSignal(str)
-    
-    def __init__(self, file_paths):
-        super().__init__()
-        self.file_paths = file_paths
-    
-    def process_files(self):
-        results = []
-        total_files = len(self.file_paths)
+# 尝试导入BLAKE3（用于查找内容相同的重复照片，未安装时使用hashlib.blake2b）
+try:
+    import blake3
+    BLAKE3_SUPPORT = True
+except ImportError:
+    BLAKE3_SUPPORT = False
+
+# Linux下尝试使用renameat2(RENAME_NOREPLACE)：一次系统调用完成“目标不存在才重命名”
+RENAMEAT2 = None
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+if sys.platform.startswith('linux'):
+    try:
+        import ctypes
+        RENAMEAT2 = ctypes.CDLL(None, use_errno=True).renameat2
+        RENAMEAT2.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint)
+        RENAMEAT2.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        # glibc过旧（<2.28）时没有renameat2，使用检查+重命名的方式
+        RENAMEAT2 = None
+
+# 支持的图片扩展名（小写，不含点）
+IMAGE_EXTENSIONS = frozenset({
+    'jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp',
+    'cr2', 'nef', 'arw', 'dng', 'orf', 'rw2', 'pef',
+    'heic', 'heif'
+})
+
+# 需要pillow-heif支持的扩展名
+HEIC_EXTENSIONS = frozenset({'.heic', '.heif'})
+
+# 无法内存映射时，低级EXIF解析读取的文件头大小（APP1(EXIF)段几乎总在前64KB内）
+RAW_EXIF_HEADER_SIZE = 65536
+
+# 查找APP1(EXIF)段时最多扫描的APP段数量和文件偏移
+RAW_EXIF_MAX_SEGMENTS = 4
+RAW_EXIF_SCAN_LIMIT = 131072
+
+# EXIF解析进程池的启动方式：进程池在Qt界面程序的工作线程中创建，fork可能导致子进程死锁，
+# 因此使用forkserver（可用时）或spawn
+PROCESS_POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+# 预览结果缓存的最大条目数；缓存只在界面进程中查找和写入，子进程中的结果返回后再写入
+EXIF_CACHE_SIZE = 4096
+
+# 读取过程中发生异常的结果不缓存（如文件被其他程序占用），下次预览时重新读取
+UNCACHEABLE_ERRORS = frozenset({'EXIF_ERROR', 'PROCESS_ERROR'})
+
+# 每次分发给EXIF解析子进程的文件数
+EXIF_BATCH_SIZE = 8
+
+# 重命名时每个分片（同一目标文件夹）最多包含的任务数，单个大文件夹也能拆分到多个线程
+RENAME_SHARD_SIZE = 64
+
+# Windows和macOS默认文件系统不区分大小写，重名检测时按小写比较
+CASE_INSENSITIVE_FS = os.name == 'nt' or sys.platform == 'darwin'
+
+# 未安装BLAKE3时，计算文件哈希每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 重复文件移动到的子文件夹名
+DUPLICATES_FOLDER = '.duplicates'
+
+# 支持时按文件夹打开目录描述符，重命名时只传文件名（renameat），内核无需逐级解析完整路径
+DIR_FD_RENAME = os.rename in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY')
+# 目录描述符只用于定位，Linux下使用O_PATH无需读取权限
+DIR_OPEN_FLAGS = getattr(os, 'O_PATH', os.O_RDONLY) | getattr(os, 'O_DIRECTORY', 0)
+
+# 两次进度信号之间的最小间隔（秒），约30Hz，界面刷新不会更快
+PROGRESS_EMIT_INTERVAL = 0.033
+
+# 百分比不变时，界面刷新重命名进度的最小间隔（秒）
+PROGRESS_UI_INTERVAL = 0.05
+
+# Exif子IFD指针标签，DateTimeOriginal等拍摄信息存放在该子IFD中
+EXIF_IFD_POINTER = 0x8769
+
+# 时间标签ID及其优先级（数值越小优先级越高）
+TIME_TAG_IDS = {
+    36867: 0,  # DateTimeOriginal 原始拍摄时间（最高优先级）
+    306: 1,    # DateTime 修改时间
+    36868: 2,  # DateTimeDigitized 数字化时间
+}
+MAKE_TAG_ID = 271
+MODEL_TAG_ID = 272
+
+# 底层解析时需要处理的标签，其余IFD条目直接跳过
+WANTED_TAG_IDS = frozenset(TIME_TAG_IDS) | {MAKE_TAG_ID, MODEL_TAG_ID}
+
+# 标准EXIF时间格式（如 2023:12:25 14:30:22）的快速匹配；秒可省略，但出现时必须是两位数字，其后不能再有数字
+DATETIME_RE = re.compile(r'^(\d{4})[:/-](\d{2})[:/-](\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?!\d)|(?![:\d]))')
+
+# 已按 YYYYMMDD_HHMMSS_相机型号 格式命名的文件
+ALREADY_RENAMED_RE = re.compile(r'^\d{8}_\d{6}_')
+
+# 快速匹配失败时依次尝试的常见时间格式
+DATETIME_FORMATS = (
+    "%Y:%m:%d %H:%M:%S",      # 标准EXIF格式
+    "%Y-%m-%d %H:%M:%S",     # 常见格式
+    "%Y/%m/%d %H:%M:%S",     # 另一种格式
+    "%Y:%m:%d %H:%M:%S.%f",  # 带毫秒
+    "%Y-%m-%d %H:%M:%S.%f",  # 带毫秒
+    "%Y-%m-%dT%H:%M:%S",     # ISO格式
+    "%Y-%m-%dT%H:%M:%SZ",    # ISO格式带Z
+    "%Y:%m:%d %H:%M",        # 没有秒
+    "%Y-%m-%d %H:%M",        # 没有秒
+    "%Y/%m/%d %H:%M",        # 没有秒
+)
+
+# 相机型号中需要去除的字符（空格、NUL及其他空白），一次translate完成
+MODEL_STRIP_TABLE = str.maketrans('', '', ' \x00\t\n\r')
+
+# 时间字符串首尾需要去除的字符（中间的空格是日期与时间的分隔符，必须保留）
+DATE_STRIP_CHARS = ' \x00\t\n\r'
+
+# TIFF/IFD解析用的预编译结构（条目格式: 标签ID, 数据类型, 数量, 值/偏移）
+IFD_ENTRY_LE = struct.Struct('<HHLL')
+IFD_ENTRY_BE = struct.Struct('>HHLL')
+U16_LE = struct.Struct('<H')
+U16_BE = struct.Struct('>H')
+
+def _worker_extract(filepath):
+    """提取单个文件的EXIF信息并生成预览结果（模块级函数，便于在子进程中执行）"""
+    try:
+        old_name = os.path.basename(filepath)
+        _, ext = os.path.splitext(old_name)
         
-        for i, filepath in enumerate(self.file_paths):
-            try:
-                old_name = os.path.basename(filepath)
-                _, ext = os.path.splitext(old_name)
-                
-                # 检查HEIC支持
-                if ext.lower() in ['.heic', '.heif'] and not HEIC_SUPPORT:
-                    result = {
-                        'filepath': filepath,
-                        'old_name': old_name,
-                        'date_time': None,
-                        'camera_model': None,
-                        'error': 'NO_HEIC_SUPPORT',
-                        'new_name': f"NOHEIC_{old_name}"
-                    }
-                else:
-                    # 获取EXIF信息（深度增强版，仅使用PIL）
-                    date_time, camera_model, error_msg = self.get_advanced_exif_data(filepath)
-                    
-                    if error_msg and "错误:" in error_msg:
-                        result = {
-                            'filepath': filepath,
-                            'old_name': old_name,
-                            'date_time': None,
-                            'camera_model': None,
-                            'error': 'EXIF_ERROR',
-                            'new_name': f"ERROR_{old_name}"
-                        }
-                    elif date_time == "未知时间":
-                        result = {
-                            'filepath': filepath,
-                            'old_name': old_name,
-                            'date_time': "无时间信息",
-                            'camera_model': "无相机信息",
-                            'error': 'NO_EXIF_TIME',
-                            'new_name': f"NOEXIF_{old_name}"
-                        }
-                    else:
-                        # 构造基础文件名
-                        base_name = f"{date_time}_{camera_model}"
-                        result = {
-                            'filepath': filepath,
-                            'old_name': old_name,
-                            'date_time': date_time,
-                            'camera_model': camera_model,
-                            'error': None,
-                            'base_name': base_name,
-                            'extension': ext
-                        }
-                
-                results.append(result)
-                
-            except Exception as e:
-                results.append({
-                    'filepath': filepath,
-                    'old_name': os.path.basename(filepath),
-                    'date_time': None,
-                    'camera_model': None,
-                    'error': 'PROCESS_ERROR',
-                    'new_name': f"ERROR_{os.path.basename(filepath)}"
-                })
-            
-            # 发送进度更新
-            self.progress.emit(i + 1, total_files)
+        # 检查HEIC支持
+        if ext.lower() in HEIC_EXTENSIONS and not HEIC_SUPPORT:
+            return {
+                'filepath': filepath,
+                'old_name': old_name,
+                'date_time': None,
+                'camera_model': None,
+                'error': 'NO_HEIC_SUPPORT',
+                'new_name': f"NOHEIC_{old_name}"
+            }
         
-        self.finished.emit(results)
-    
-    def get_advanced_exif_data(self, filepath):
-        """高级EXIF数据获取，使用PIL的多种方法"""
-        try:
-            # 方法1: 使用PIL的getexif()方法
-            try:
-                image = Image.open(filepath)
-                exifdata = image.getexif()
-                if exifdata:
-                    date_time, camera_model = self.parse_exif_with_pil(exifdata)
-                    if date_time and date_time != "未知时间":
-                        return date_time, camera_model, None
-            except Exception as e:
-                pass
-            
-            # 方法2: 尝试使用_exif实例变量
-            try:
-                image = Image.open(filepath)
-                if hasattr(image, '_getexif'):
-                    exifdata = image._getexif()
-                    if exifdata:
-                        date_time, camera_model = self.parse_exif_with_pil(exifdata)
-                        if date_time and date_time != "未知时间":
-                            return date_time, camera_model, None
-            except Exception as e:
-                pass
-            
-            # 方法3: 尝试直接访问_exif属性
+        # 获取EXIF信息（深度增强版，仅使用PIL）
+        date_time, camera_model, error_msg = get_advanced_exif_data(filepath)
+        
+        if error_msg and "错误:" in error_msg:
+            return {
+                'filepath': filepath,
+                'old_name': old_name,
+                'date_time': None,
+                'camera_model': None,
+                'error': 'EXIF_ERROR',
+                'new_name': f"ERROR_{old_name}"
+            }
+        elif date_time == "未知时间":
+            return {
+                'filepath': filepath,
+                'old_name': old_name,
+                'date_time': "无时间信息",
+                'camera_model': "无相机信息",
+                'error': 'NO_EXIF_TIME',
+                'new_name': f"NOEXIF_{old_name}"
+            }
+        
+        # 构造基础文件名
+        base_name = f"{date_time}_{camera_model}"
+        return {
+            'filepath': filepath,
+            'folder': os.path.dirname(filepath),
+            'old_name': old_name,
+            'date_time': date_time,
+            'camera_model': camera_model,
+            'error': None,
+            'base_name': base_name,
+            'extension': ext
+        }
+        
+    except Exception as e:
+        return _process_error_result(filepath)
+
+def _process_error_result(filepath):
+    """处理文件时发生异常（包括子进程崩溃）的预览结果"""
+    return {
+        'filepath': filepath,
+        'old_name': os.path.basename(filepath),
+        'date_time': None,
+        'camera_model': None,
+        'error': 'PROCESS_ERROR',
+        'new_name': f"ERROR_{os.path.basename(filepath)}"
+    }
+
+# (文件路径, 修改时间, 大小) -> 预览结果，文件变化后键不同，旧结果自动失效
+EXIF_RESULT_CACHE = {}
+
+def _worker_extract_batch(filepaths):
+    """在子进程中处理一批文件，减少进程间通信和进度信号的次数"""
+    return [_worker_extract(filepath) for filepath in filepaths]
+
+def _use_process_pool(file_count):
+    """文件数量足够多时才值得启动进程池"""
+    # spawn/forkserver模式下每个子进程都要重新导入本模块及PyQt6/PIL，启动代价较高
+    if PROCESS_POOL_CONTEXT.get_start_method() == 'fork':
+        return file_count >= 16
+    return file_count >= 64
+
+def _read_pil_exif(f):
+    """使用PIL的getexif()读取IFD0及Exif子IFD"""
+    # 传入已打开的文件对象时，PIL关闭图像不会关闭该文件，后续底层解析可继续使用
+    with Image.open(f) as image:
+        exif = image.getexif()
+        exifdata = dict(exif)
+        # getexif()只包含IFD0，拍摄时间(DateTimeOriginal)等标签位于Exif子IFD中
+        exifdata.update(exif.get_ifd(EXIF_IFD_POINTER))
+    return exifdata
+
+def get_advanced_exif_data(filepath):
+    """高级EXIF数据获取，优先使用PIL，失败时回退到底层解析"""
+    try:
+        # 两种方法共用同一个文件句柄，回退到底层解析时无需重新打开文件；文件无法打开时按错误处理
+        with open(filepath, 'rb') as f:
+            # 方法1: 使用PIL读取EXIF标签
             try:
-                image = Image.open(filepath)
-                if hasattr(image, '_exif') and image._exif:
-                    date_time, camera_model = self.parse_exif_with_pil(image._exif)
-                    if date_time and date_time != "未知时间":
-                        return date_time, camera_model, None
+                exifdata = _read_pil_exif(f)
             except Exception as e:
-                pass
+                exifdata = None
             
-            # 方法4: 尝试从raw exif数据中提取
-            try:
-                date_time, camera_model = self.parse_raw_exif(filepath)
+            if exifdata:
+                date_time, camera_model = parse_exif_with_pil(exifdata)
                 if date_time and date_time != "未知时间":
                     return date_time, camera_model, None
-            except Exception as e:
-                pass
-            
-            # 如果以上方法都失败，返回未知时间
-            return "未知时间", "Unknown", "无EXIF信息"
+                
+                # PIL已读到EXIF但其中没有时间（常见于截图、编辑过的图片），底层解析同一份数据也不会有结果
+                return "未知时间", camera_model, "无时间信息"
             
-        except Exception as e:
-            return "未知时间", "Unknown", f"错误: {str(e)}"
-    
-    def parse_exif_with_pil(self, exifdata):
-        """使用PIL方式解析EXIF数据"""
-        # 定义时间字段的优先级顺序
-        time_fields = [
-            "DateTimeOriginal",    # 原始拍摄时间（最高优先级）
-            "DateTime",           # 修改时间
-            "DateTimeDigitized",  # 数字化时间
-            "CreateDate",         # 创建时间（苹果设备）
-            "ModifyDate"          # 修改时间（苹果设备）
-        ]
-        
-        date_time = None
-        camera_model = "Unknown"
-        
-        # 按优先级查找时间信息
-        for field in time_fields:
-            for tag_id in exifdata:
-                tag = TAGS.get(tag_id, tag_id)
-                if tag == field:
-                    raw_value = exifdata.get(tag_id)
-                    # 处理不同类型的值
-                    if isinstance(raw_value, bytes):
-                        value = raw_value.decode('utf-8', errors='ignore').strip()
-                    elif isinstance(raw_value, str):
-                        value = raw_value.strip()
-                    else:
-                        value = str(raw_value).strip()
-                    
-                    if value and value != "0000:00:00 00:00:00":
-                        date_time = value
-                        break
-                # 同时查找相机型号
-                elif tag == "Model":
-                    raw_value = exifdata.get(tag_id)
-                    if isinstance(raw_value, bytes):
-                        camera_model = raw_value.decode('utf-8', errors='ignore').strip().replace(" ", "")
-                    elif isinstance(raw_value, str):
-                        camera_model = raw_value.strip().replace(" ", "")
-                    else:
-                        camera_model = str(raw_value).strip().replace(" ", "")
-                elif tag == "Make":  # 如果没有Model，尝试使用Make
-                    raw_value = exifdata.get(tag_id)
-                    if isinstance(raw_value, bytes):
-                        make = raw_value.decode('utf-8', errors='ignore').strip()
-                    elif isinstance(raw_value, str):
-                        make = raw_value.strip()
-                    else:
-                        make = str(raw_value).strip()
-                    
-                    if make and camera_model == "Unknown":
-                        camera_model = make.replace(" ", "")
-            if date_time:
-                break
+            # 方法2: 尝试从raw exif数据中提取
+            date_time, camera_model = parse_raw_exif(f)
+            if date_time and date_time != "未知时间":
+                return date_time, camera_model, None
         
-        # 如果仍然没有找到时间信息，尝试遍历所有标签
-        if not date_time:
-            for tag_id in exifdata:
-                tag = TAGS.get(tag_id, tag_id)
-                if tag in time_fields:
-                    raw_value = exifdata.get(tag_id)
-                    if isinstance(raw_value, bytes):
-                        value = raw_value.decode('utf-8', errors='ignore').strip()
-                    elif isinstance(raw_value, str):
-                        value = raw_value.strip()
-                    else:
-                        value = str(raw_value).strip()
-                    
-                    if value and value != "0000:00:00 00:00:00":
-                        date_time = value
-                        break
-                elif tag == "Model":
-                    raw_value = exifdata.get(tag_id)
-                    if isinstance(raw_value, bytes):
-                        camera_model = raw_value.decode('utf-8', errors='ignore').strip().replace(" ", "")
-                    elif isinstance(raw_value, str):
-                        camera_model = raw_value.strip().replace(" ", "")
-                    else:
-                        camera_model = str(raw_value).strip().replace(" ", "")
-                elif tag == "Make":
-                    raw_value = exifdata.get(tag_id)
-                    if isinstance(raw_value, bytes):
-                        make = raw_value.decode('utf-8', errors='ignore').strip()
-                    elif isinstance(raw_value, str):
-                        make = raw_value.strip()
-                    else:
-                        make = str(raw_value).strip()
-                    
-                    if make and camera_model == "Unknown":
-                        camera_model = make.replace(" ", "")
-        
-        # 格式化日期时间
-        if date_time:
-            formatted_datetime = self.format_datetime_string(date_time)
-            if formatted_datetime != "未知时间":
-                return formatted_datetime, camera_model
+        # 如果以上方法都失败，返回未知时间
+        return "未知时间", "Unknown", "无EXIF信息"
         
-        return "未知时间", camera_model
+    except Exception as e:
+        return "未知时间", "Unknown", f"错误: {str(e)}"
+
+def _exif_value_to_str(raw_value):
+    """将EXIF标签值统一转换为字符串"""
+    if isinstance(raw_value, bytes):
+        return raw_value.decode('utf-8', errors='ignore')
+    elif isinstance(raw_value, str):
+        return raw_value
+    else:
+        return str(raw_value)
+
+def parse_exif_with_pil(exifdata):
+    """使用PIL方式解析EXIF数据"""
+    date_time = None
+    date_priority = len(TIME_TAG_IDS)
+    model = None
+    make = None
+    
+    # 热点循环中使用局部变量，避免每个标签都查找全局名称
+    get_time_priority = TIME_TAG_IDS.get
+    to_str = _exif_value_to_str
     
-    def parse_raw_exif(self, filepath):
-        """直接从文件中解析EXIF数据（低级方法）"""
+    # 单次遍历所有标签：按优先级保留时间信息，同时查找相机型号
+    for tag_id, raw_value in exifdata.items():
+        priority = get_time_priority(tag_id)
+        if priority is not None:
+            if priority < date_priority:
+                value = to_str(raw_value).strip(DATE_STRIP_CHARS)
+                if value and value != "0000:00:00 00:00:00":
+                    date_time = value
+                    date_priority = priority
+        elif tag_id == MODEL_TAG_ID:
+            model = to_str(raw_value).translate(MODEL_STRIP_TABLE)
+        elif tag_id == MAKE_TAG_ID:  # 如果没有Model，尝试使用Make
+            make = to_str(raw_value).translate(MODEL_STRIP_TABLE)
+    
+    camera_model = model or make or "Unknown"
+    
+    # 格式化日期时间
+    if date_time:
+        formatted_datetime = format_datetime_string(date_time)
+        if formatted_datetime != "未知时间":
+            return formatted_datetime, camera_model
+    
+    return "未知时间", camera_model
+
+def parse_raw_exif(f):
+    """直接从文件头解析EXIF数据（低级方法）"""
+    try:
+        # 只读映射文件：只有实际访问到的文件头页面才会从磁盘读入，切片也不复制数据
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # 先检查JPEG文件头，非JPEG文件（如大多数RAW）不必预读
+            if data[:2] != b'\xff\xd8':
+                return "未知时间", "Unknown"
+            # 一次性请求预读整个扫描范围，避免逐页缺页产生大量小读取（网络文件系统上尤其明显）
+            if hasattr(mmap, 'MADV_WILLNEED'):
+                data.madvise(mmap.MADV_WILLNEED, 0, min(len(data), RAW_EXIF_SCAN_LIMIT))
+            return parse_jpeg_app1(data)
+    except (ValueError, OSError) as e:
+        # 空文件或不支持内存映射时，退回到读取文件头
         try:
-            with open(filepath, 'rb') as f:
-                # 检查是否是JPEG文件
-                header = f.read(2)
-                if header != b'\xff\xd8':
-                    return "未知时间", "Unknown"
-                
-                f.seek(0)
-                # 跳过JFIF头
-                f.read(2)
-                
-                while True:
-                    marker = f.read(2)
-                    if not marker or len(marker) < 2:
-                        break
-                    
-                    if marker[0:1] != b'\xff':
-                        break
-                    
-                    if marker[1:2] in b'\xe1':  # APP1标记，通常包含EXIF
-                        length = struct.unpack('>H', f.read(2))[0]
-                        exif_data = f.read(length - 2)
-                        
-                        if exif_data.startswith(b'Exif\x00\x00'):
-                            # 解析TIFF头
-                            tiff_data = exif_data[6:]
-                            return self.parse_tiff_data(tiff_data)
-                    
-                    elif marker[1:2] in b'\xe0\xe2\xe3\xe4\xe5\xe6\xe7\xe8\xe9\xea\xeb\xec\xed\xee\xef':
-                        # 其他APP段，跳过
-                        length = struct.unpack('>H', f.read(2))[0]
-                        f.seek(length - 2, os.SEEK_CUR)
-                    else:
-                        break
-                        
+            f.seek(0)
+            return parse_jpeg_app1(f.read(RAW_EXIF_HEADER_SIZE))
         except Exception as e:
             pass
-        
+    except Exception as e:
+        pass
+    
+    return "未知时间", "Unknown"
+
+def parse_jpeg_app1(data):
+    """在文件内容中查找JPEG的APP1(EXIF)段并解析"""
+    # 检查是否是JPEG文件
+    if data[:2] != b'\xff\xd8':
         return "未知时间", "Unknown"
     
-    def parse_tiff_data(self, tiff_data):
-        """解析TIFF格式的EXIF数据"""
-        try:
-            if len(tiff_data) < 8:
-                return "未知时间", "Unknown"
+    with memoryview(data) as view:
+        # 跳过SOI标记
+        pos = 2
+        segments_scanned = 0
+        
+        while pos + 4 <= len(data):
+            # EXIF紧跟在文件开头，超出扫描范围（如大体积的XMP/ICC段之后）不再继续查找
+            if segments_scanned >= RAW_EXIF_MAX_SEGMENTS or pos > RAW_EXIF_SCAN_LIMIT:
+                break
+            segments_scanned += 1
             
-            # 检查字节顺序
-            byte_order = tiff_data[:2]
-            if byte_order == b'II':
-                endian = '<'  # Little endian
-            elif byte_order == b'MM':
-                endian = '>'  # Big endian
-            else:
-                return "未知时间", "Unknown"
+            marker = data[pos:pos+2]
+            if marker[0:1] != b'\xff':
+                break
             
-            # 检查TIFF标识
-            tiff_id = struct.unpack(endian + 'H', tiff_data[2:4])[0]
-            if tiff_id != 42:
-                return "未知时间", "Unknown"
+            length = int.from_bytes(data[pos+2:pos+4], 'big')
+            if length < 2:
+                break
             
-            # 获取第一个IFD偏移
-            ifd_offset = struct.unpack(endian + 'L', tiff_data[4:8])[0]
+            if marker[1:2] in b'\xe1':  # APP1标记，通常包含EXIF
+                if data[pos+4:pos+10] == b'Exif\x00\x00':
+                    # 解析TIFF头（memoryview切片，不复制段数据）
+                    return parse_tiff_data(view[pos+10:pos+2+length])
             
-            # 解析IFD
-            date_time, camera_model = self.parse_ifd(tiff_data, ifd_offset, endian)
-            return date_time, camera_model
+            elif marker[1:2] in b'\xe0\xe2\xe3\xe4\xe5\xe6\xe7\xe8\xe9\xea\xeb\xec\xed\xee\xef':
+                # 其他APP段，跳过
+                pass
+            else:
+                break
             
-        except Exception as e:
-            return "未知时间", "Unknown"
+            pos += 2 + length
     
-    def parse_ifd(self, tiff_data, offset, endian):
-        """解析图像文件目录(IFD)"""
-        try:
-            if offset + 2 > len(tiff_data):
-                return "未知时间", "Unknown"
+    return "未知时间", "Unknown"
+
+def parse_tiff_data(tiff_data):
+    """解析TIFF格式的EXIF数据"""
+    try:
+        if len(tiff_data) < 8:
+            return "未知时间", "Unknown"
+        
+        # 检查字节顺序
+        byte_order = tiff_data[:2]
+        if byte_order == b'II':
+            endian = '<'  # Little endian
+        elif byte_order == b'MM':
+            endian = '>'  # Big endian
+        else:
+            return "未知时间", "Unknown"
+        
+        byteorder = 'little' if endian == '<' else 'big'
+        
+        # 检查TIFF标识
+        tiff_id = int.from_bytes(tiff_data[2:4], byteorder)
+        if tiff_id != 42:
+            return "未知时间", "Unknown"
+        
+        # 获取第一个IFD偏移
+        ifd_offset = int.from_bytes(tiff_data[4:8], byteorder)
+        
+        # 解析IFD
+        date_time, camera_model = parse_ifd(tiff_data, ifd_offset, endian)
+        return date_time, camera_model
+        
+    except Exception as e:
+        return "未知时间", "Unknown"
+
+def parse_ifd(tiff_data, offset, endian):
+    """解析图像文件目录(IFD)"""
+    try:
+        if offset + 2 > len(tiff_data):
+            return "未知时间", "Unknown"
+        
+        # 使用预编译的Struct，一次调用解出整个IFD条目
+        if endian == '<':
+            entry_struct, u16_struct = IFD_ENTRY_LE, U16_LE
+        else:
+            entry_struct, u16_struct = IFD_ENTRY_BE, U16_BE
+        
+        # 循环内反复使用的方法和全局常量绑定为局部变量，减少每个条目的属性/全局查找
+        unpack_entry = entry_struct.unpack_from
+        unpack_u16 = u16_struct.unpack_from
+        wanted_tag_ids = WANTED_TAG_IDS
+        data_len = len(tiff_data)
+        
+        num_entries = unpack_u16(tiff_data, offset)[0]
+        entry_start = offset + 2
+        # 只遍历完整落在数据范围内的条目，循环中无需再逐个检查边界
+        entry_end = min(entry_start + num_entries * 12, data_len - 11)
+        
+        date_time = "未知时间"
+        date_priority = len(TIME_TAG_IDS)
+        camera_model = "Unknown"
+        found_model = False
+        
+        for entry_offset in range(entry_start, entry_end, 12):
+            # 已找到最高优先级的拍摄时间和相机型号，无需继续遍历
+            if date_priority == 0 and found_model:
+                break
             
-            num_entries = struct.unpack(endian + 'H', tiff_data[offset:offset+2])[0]
-            entry_start = offset + 2
+            # 先只读取标签ID，跳过不需要的标签
+            if unpack_u16(tiff_data, entry_offset)[0] not in wanted_tag_ids:
+                continue
             
-            date_time = "未知时间"
-            camera_model = "Unknown"
+            tag_id, data_type, count, value_offset = unpack_entry(tiff_data, entry_offset)
             
-            for i in range(num_entries):
-                entry_offset = entry_start + i * 12
-                if entry_offset + 12 > len(tiff_data):
-                    continue
-                    
-                entry_data = tiff_data[entry_offset:entry_offset+12]
-                if len(entry_data) < 12:
-                    continue
-                
-                tag_id = struct.unpack(endian + 'H', entry_data[0:2])[0]
-                data_type = struct.unpack(endian + 'H', entry_data[2:4])[0]
-                count = struct.unpack(endian + 'L', entry_data[4:8])[0]
-                value_offset = struct.unpack(endian + 'L', entry_data[8:12])[0]
-                
-                # 查找时间相关标签 (DateTimeOriginal=36867, DateTime=306, DateTimeDigitized=36868)
-                if tag_id in [306, 36867, 36868]:  # DateTime, DateTimeOriginal, DateTimeDigitized
-                    if count < 20:  # 日期时间字符串通常不会太长
-                        if count <= 4:  # 值直接存储在offset字段中
-                            value_data = entry_data[8:12]
-                        else:
-                            # 从指定偏移处读取数据
-                            if value_offset < len(tiff_data):
-                                value_data = tiff_data[value_offset:value_offset+count]
-                                if len(value_data) >= count:
-                                    try:
-                                        date_str = value_data.decode('utf-8', errors='ignore').strip('\x00')
-                                        if date_str and date_str != "0000:00:00 00:00:00":
-                                            formatted_time = self.format_datetime_string(date_str)
-                                            if formatted_time != "未知时间":
-                                                date_time = formatted_time
-                                    except:
-                                        pass
-                elif tag_id == 272:  # Model
-                    if count <= 4:
-                        value_data = entry_data[8:12]
+            # 查找时间相关标签，只保留优先级更高的时间
+            priority = TIME_TAG_IDS.get(tag_id)
+            if priority is not None:
+                if count < 20 and priority < date_priority:  # 日期时间字符串通常不会太长
+                    if count <= 4:  # 值直接存储在offset字段中
+                        value_data = tiff_data[entry_offset+8:entry_offset+12]
                     else:
-                        if value_offset < len(tiff_data):
+                        # 从指定偏移处读取数据
+                        if value_offset < data_len:
                             value_data = tiff_data[value_offset:value_offset+count]
                             if len(value_data) >= count:
                                 try:
-                                    model_str = value_data.decode('utf-8', errors='ignore').strip('\x00').strip().replace(" ", "")
-                                    if model_str:
-                                        camera_model = model_str
+                                    date_str = bytes(value_data).decode('utf-8', errors='ignore').strip(DATE_STRIP_CHARS)
+                                    if date_str and date_str != "0000:00:00 00:00:00":
+                                        formatted_time = format_datetime_string(date_str)
+                                        if formatted_time != "未知时间":
+                                            date_time = formatted_time
+                                            date_priority = priority
                                 except:
                                     pass
-                elif tag_id == 271:  # Make
-                    if count <= 4:
-                        value_data = entry_data[8:12]
-                    else:
-                        if value_offset < len(tiff_data):
-                            value_data = tiff_data[value_offset:value_offset+count]
-                            if len(value_data) >= count:
-                                try:
-                                    make_str = value_data.decode('utf-8', errors='ignore').strip('\x00').strip().replace(" ", "")
-                                    if make_str and camera_model == "Unknown":
-                                        camera_model = make_str
-                                except:
-                                    pass
-            
-            return date_time, camera_model
-            
-        except Exception as e:
-            return "未知时间", "Unknown"
+            elif tag_id == MODEL_TAG_ID:
+                if count <= 4:
+                    value_data = tiff_data[entry_offset+8:entry_offset+12]
+                else:
+                    if value_offset < data_len:
+                        value_data = tiff_data[value_offset:value_offset+count]
+                        if len(value_data) >= count:
+                            try:
+                                model_str = bytes(value_data).decode('utf-8', errors='ignore').translate(MODEL_STRIP_TABLE)
+                                if model_str:
+                                    camera_model = model_str
+                                    found_model = True
+                            except:
+                                pass
+            elif tag_id == MAKE_TAG_ID:  # 如果没有Model，尝试使用Make
+                if count <= 4:
+                    value_data = tiff_data[entry_offset+8:entry_offset+12]
+                else:
+                    if value_offset < data_len:
+                        value_data = tiff_data[value_offset:value_offset+count]
+                        if len(value_data) >= count:
+                            try:
+                                make_str = bytes(value_data).decode('utf-8', errors='ignore').translate(MODEL_STRIP_TABLE)
+                                if make_str and camera_model == "Unknown":
+                                    camera_model = make_str
+                            except:
+                                pass
+        
+        return date_time, camera_model
+        
+    except Exception as e:
+        return "未知时间", "Unknown"
+
+def format_datetime_string(date_time_str):
+    """格式化日期时间字符串"""
+    if not date_time_str:
+        return "未知时间"
     
-    def format_datetime_string(self, date_time_str):
-        """格式化日期时间字符串"""
-        if not date_time_str:
-            return "未知时间"
-        
-        # 确保是字符串
-        if isinstance(date_time_str, bytes):
-            date_time_str = date_time_str.decode('utf-8', errors='ignore')
-        elif not isinstance(date_time_str, str):
-            date_time_str = str(date_time_str)
-        
-        # 常见的时间格式
-        formats = [
-            "%Y:%m:%d %H:%M:%S",      # 标准EXIF格式
-            "%Y-%m-%d %H:%M:%S",     # 常见格式
-            "%Y/%m/%d %H:%M:%S",     # 另一种格式
-            "%Y:%m:%d %H:%M:%S.%f",  # 带毫秒
-            "%Y-%m-%d %H:%M:%S.%f",  # 带毫秒
-            "%Y-%m-%dT%H:%M:%S",     # ISO格式
-            "%Y-%m-%dT%H:%M:%SZ",    # ISO格式带Z
-            "%Y:%m:%d %H:%M",        # 没有秒
-            "%Y-%m-%d %H:%M",        # 没有秒
-            "%Y/%m/%d %H:%M",        # 没有秒
-        ]
-        
-        for fmt in formats:
+    # 确保是字符串
+    if isinstance(date_time_str, bytes):
+        date_time_str = date_time_str.decode('utf-8', errors='ignore')
+    elif not isinstance(date_time_str, str):
+        date_time_str = str(date_time_str)
+    
+    date_time_str = date_time_str.strip()
+    
+    # 快速路径：绝大多数EXIF时间为标准格式，直接拼接字段，无需strptime
+    match = DATETIME_RE.match(date_time_str)
+    if match:
+        # 用datetime校验各字段（含月份天数、时分秒范围），无效时交给下面的strptime处理
+        try:
+            datetime(int(match[1]), int(match[2]), int(match[3]),
+                     int(match[4]), int(match[5]), int(match[6] or 0))
+        except ValueError:
+            pass
+        else:
+            return f"{match[1]}{match[2]}{match[3]}_{match[4]}{match[5]}{match[6] or '00'}"
+    
+    for fmt in DATETIME_FORMATS:
+        try:
+            dt_obj = datetime.strptime(date_time_str, fmt)
+            return dt_obj.strftime("%Y%m%d_%H%M%S")
+        except ValueError:
+            continue
+    
+    return "未知时间"
+
+class ExifWorker(QObject):
+    """EXIF数据提取工作线程"""
+    finished = pyqtSignal(list)
+    progress = pyqtSignal(int, int)  # current, total
+    hash_progress = pyqtSignal(int, int)  # 查找重复文件: current, total
+    error = pyqtSignal(str)
+    
+    def __init__(self, file_paths, skip_renamed=True):
+        super().__init__()
+        self.file_paths = file_paths
+        self.skip_renamed = skip_renamed
+    
+    def process_files(self):
+        total_files = len(self.file_paths)
+        results = [None] * total_files
+        processed = 0
+        last_emit = 0.0
+        
+        # 文件名已符合目标格式（之前处理过）的文件直接跳过，无需打开文件读取EXIF
+        if self.skip_renamed:
+            for i, filepath in enumerate(self.file_paths):
+                old_name = os.path.basename(filepath)
+                if ALREADY_RENAMED_RE.match(old_name):
+                    results[i] = {
+                        'filepath': filepath,
+                        'old_name': old_name,
+                        'date_time': None,
+                        'camera_model': None,
+                        'error': 'ALREADY_RENAMED',
+                        'new_name': old_name
+                    }
+                    processed += 1
+        
+        # 文件未变化（修改时间和大小相同）时直接使用上次预览的结果，无需再分发给子进程
+        cache_keys = [None] * total_files
+        for i, filepath in enumerate(self.file_paths):
+            if results[i] is None:
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+                key = cache_keys[i] = (filepath, stat.st_mtime_ns, stat.st_size)
+                cached = EXIF_RESULT_CACHE.pop(key, None)
+                if cached is not None:
+                    # 重新插入，保持最近使用的条目在末尾
+                    EXIF_RESULT_CACHE[key] = cached
+                    results[i] = dict(cached)
+                    processed += 1
+        
+        if processed:
+            self.progress.emit(processed, total_files)
+            last_emit = time.monotonic()
+        
+        pending = [i for i in range(total_files) if results[i] is None]
+        
+        # 进程池和串行处理共用的状态，完成的结果按原顺序放回
+        self.results = results
+        self.processed = processed
+        self.last_emit = last_emit
+        self.pool_crashed = False
+        
+        if _use_process_pool(len(pending)):
+            # EXIF解析是CPU密集型任务，分批分发到多个进程以绕开GIL
             try:
-                dt_obj = datetime.strptime(date_time_str.strip(), fmt)
-                return dt_obj.strftime("%Y%m%d_%H%M%S")
-            except ValueError:
-                continue
+                self.process_in_pools(pending)
+            except OSError:
+                # 无法创建进程池时，未完成的文件回退到当前线程中串行处理；
+                # 但若已有子进程崩溃，剩余文件中可能包含导致崩溃的文件，不能在界面进程中打开
+                if self.pool_crashed:
+                    for i in pending:
+                        if results[i] is None:
+                            self.store_result(i, _process_error_result(self.file_paths[i]))
         
-        return "未知时间"
+        for i in pending:
+            if results[i] is None:
+                self.store_result(i, _worker_extract(self.file_paths[i]))
+        
+        # 文件大小用于重复检测，直接取自缓存键中已有的stat结果，只有stat失败过的文件才重新获取
+        for i in pending:
+            if results[i]['error'] is None:
+                if cache_keys[i] is not None:
+                    results[i]['size'] = cache_keys[i][2]
+                else:
+                    try:
+                        results[i]['size'] = os.path.getsize(self.file_paths[i])
+                    except OSError:
+                        results[i] = _process_error_result(self.file_paths[i])
+        
+        # 缓存新读取的结果（保存副本，之后对结果的修改不影响缓存），超出上限时淘汰最久未使用的条目
+        for i in pending:
+            if cache_keys[i] is not None and results[i]['error'] not in UNCACHEABLE_ERRORS:
+                EXIF_RESULT_CACHE[cache_keys[i]] = dict(results[i])
+        while len(EXIF_RESULT_CACHE) > EXIF_CACHE_SIZE:
+            del EXIF_RESULT_CACHE[next(iter(EXIF_RESULT_CACHE))]
+        
+        self.mark_duplicates(results)
+        self.finished.emit(results)
+    
+    def store_result(self, i, result):
+        """保存单个文件的结果并发送进度更新（限制频率，最后一个文件总会发送）"""
+        self.results[i] = result
+        self.processed += 1
+        total_files = len(self.results)
+        now = time.monotonic()
+        if now - self.last_emit > PROGRESS_EMIT_INTERVAL or self.processed == total_files:
+            self.progress.emit(self.processed, total_files)
+            self.last_emit = now
+    
+    def process_in_pools(self, pending):
+        """在进程池中处理文件；子进程崩溃（如损坏的文件导致解码库段错误）时找出并隔离出问题的文件"""
+        # Windows下进程池最多支持61个进程
+        max_workers = min(os.cpu_count() or 1, 61)
+        todo = pending
+        while todo:
+            unfinished = self.run_pool(todo, EXIF_BATCH_SIZE, max_workers)
+            # 任务按提交顺序分发，崩溃时正在执行或已排队的只可能是最前面的若干批（每个进程一批，调用队列中至多再有max_workers+1批），
+            # 之后的文件尚未分发，可以放心地重新批量处理
+            in_flight = (2 * max_workers + 1) * EXIF_BATCH_SIZE
+            suspects, todo = unfinished[:in_flight], unfinished[in_flight:]
+            
+            # 可疑文件在单进程池中逐个处理：单个进程按顺序执行，崩溃时第一个未完成的文件就是出问题的文件
+            while suspects:
+                unfinished = self.run_pool(suspects, 1, 1)
+                if not unfinished:
+                    break
+                self.store_result(unfinished[0], _process_error_result(self.file_paths[unfinished[0]]))
+                suspects = unfinished[1:]
+    
+    def run_pool(self, indices, batch_size, max_workers):
+        """在新的进程池中分批处理文件，返回因进程池崩溃而未完成的文件（按提交顺序）"""
+        futures = {}
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=PROCESS_POOL_CONTEXT) as executor:
+                for start in range(0, len(indices), batch_size):
+                    batch = indices[start:start + batch_size]
+                    future = executor.submit(_worker_extract_batch, [self.file_paths[i] for i in batch])
+                    futures[future] = batch
+                
+                # 哪一批先完成就先处理
+                for future in as_completed(futures):
+                    for i, result in zip(futures[future], future.result()):
+                        self.store_result(i, result)
+        except BrokenProcessPool:
+            self.pool_crashed = True
+        
+        return [i for batch in futures.values() for i in batch if self.results[i] is None]
+    
+    def mark_duplicates(self, results):
+        """查找内容完全相同的照片，在结果中记录与之相同的第一个文件"""
+        # 只有新文件名和大小都相同的文件才可能重复，其余文件无需计算哈希
+        groups = {}
+        for result in results:
+            if result['error'] is None:
+                key = (result['base_name'], result['extension'].lower(), result['size'])
+                groups.setdefault(key, []).append(result)
+        candidates = [group for group in groups.values() if len(group) > 1]
+        if not candidates:
+            return
+        
+        # 在线程池中并行计算哈希（哈希计算期间会释放GIL）
+        paths = [result['filepath'] for group in candidates for result in group]
+        pool = QThreadPool()
+        pool.setMaxThreadCount(max(2, QThread.idealThreadCount() - 2))
+        digests = queue.Queue()
+        for path in paths:
+            pool.start(HashJob(path, digests))
+        
+        # 大文件（如RAW）计算哈希耗时较长，单独发送进度，避免界面看起来停在100%
+        total_paths = len(paths)
+        self.hash_progress.emit(0, total_paths)
+        last_emit = time.monotonic()
+        digest_by_path = {}
+        for done in range(1, total_paths + 1):
+            path, digest = digests.get()
+            digest_by_path[path] = digest
+            now = time.monotonic()
+            if now - last_emit > PROGRESS_EMIT_INTERVAL or done == total_paths:
+                self.hash_progress.emit(done, total_paths)
+                last_emit = now
+        pool.waitForDone()
+        
+        for group in candidates:
+            first_by_digest = {}
+            for result in group:
+                digest = digest_by_path[result['filepath']]
+                if digest is None:
+                    continue
+                first = first_by_digest.setdefault(digest, result)
+                if first is result:
+                    continue
+                # 哈希相同后再逐字节比较确认
+                try:
+                    if filecmp.cmp(first['filepath'], result['filepath'], shallow=False):
+                        result['duplicate_of'] = first['filepath']
+                except OSError:
+                    pass
+
+class HashJob(QRunnable):
+    """在线程池中计算单个文件的内容哈希"""
+    
+    def __init__(self, filepath, digests):
+        super().__init__()
+        self.filepath = filepath
+        self.digests = digests
+    
+    def run(self):
+        try:
+            digest = file_digest(self.filepath)
+        except Exception as e:
+            digest = None
+        self.digests.put((self.filepath, digest))
+
+def folder_name_key(name):
+    """文件名在重名检测中使用的比较键"""
+    return name.lower() if CASE_INSENSITIVE_FS else name
+
+def file_digest(filepath):
+    """计算文件内容的哈希值，优先使用BLAKE3"""
+    if BLAKE3_SUPPORT:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO).update_mmap(filepath).digest()
+    
+    digest = hashlib.blake2b()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def list_folder_names(folder_path):
+    """一次性读取文件夹中已有的文件名（转换为比较键）"""
+    try:
+        with os.scandir(folder_path) as entries:
+            return {folder_name_key(entry.name) for entry in entries}
+    except OSError:
+        return set()
+
+def rename_no_replace(old_path, new_path, src_dir_fd=None, dst_dir_fd=None, try_renameat2=True):
+    """重命名文件，目标已存在时抛出FileExistsError而不是覆盖（指定目录描述符时路径相对于该目录）
+    
+    返回是否通过renameat2完成；返回False时调用方可以记住该目标文件夹，之后传入try_renameat2=False跳过
+    """
+    renameat2 = RENAMEAT2 if try_renameat2 else None
+    if renameat2 is not None:
+        src_fd = AT_FDCWD if src_dir_fd is None else src_dir_fd
+        dst_fd = AT_FDCWD if dst_dir_fd is None else dst_dir_fd
+        if renameat2(src_fd, os.fsencode(old_path), dst_fd, os.fsencode(new_path), RENAME_NOREPLACE) == 0:
+            return True
+        err = ctypes.get_errno()
+        # 内核或文件系统（如NFS）不支持RENAME_NOREPLACE时回退，其他错误（包括目标已存在）直接抛出
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), old_path, None, new_path)
+    
+    # Windows下os.rename在目标存在时会报错；其他平台会静默覆盖，因此先检查一次（fstatat）
+    if os.name != 'nt':
+        try:
+            os.stat(new_path, dir_fd=dst_dir_fd)
+        except OSError:
+            pass
+        else:
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), new_path)
+    os.rename(old_path, new_path, src_dir_fd=src_dir_fd, dst_dir_fd=dst_dir_fd)
+    return False
 
 class RenameWorker(QObject):
     """文件重命名工作线程"""
@@ -438,35 +811,199 @@ class RenameWorker(QObject):
     def __init__(self, rename_tasks):
         super().__init__()
         self.rename_tasks = rename_tasks
+        # 所有任务预先分配的目标路径，回退编号时需避开
+        self.claimed_paths = {task['new_path'] for task in rename_tasks}
+        self.fallback_lock = threading.Lock()
+        # 文件夹路径 -> 目录描述符，重命名期间有效
+        self.dir_fds = {}
+        # 所在文件系统不支持RENAME_NOREPLACE的目标文件夹，之后直接使用检查+重命名
+        self.noreplace_unsupported = set()
     
     def rename_files(self):
+        total_files = len(self.rename_tasks)
+        
+        # 按目标文件夹分片，交给线程池并行重命名；重命名以IO延迟为主（尤其是网络共享目录），并行以重叠等待时间
+        shards_by_folder = {}
+        for task in self.rename_tasks:
+            shards_by_folder.setdefault(task['folder'], []).append(task)
+        
+        # 源文件夹和目标文件夹各打开一次，重命名结束后关闭
+        if DIR_FD_RENAME:
+            folders = {os.path.dirname(task['filepath']) for task in self.rename_tasks}
+            folders.update(shards_by_folder)
+            for folder in folders:
+                try:
+                    self.dir_fds[folder] = os.open(folder, DIR_OPEN_FLAGS)
+                except OSError:
+                    pass
+        
+        try:
+            success_count, error_count = self.run_shards(shards_by_folder, total_files)
+        finally:
+            for fd in self.dir_fds.values():
+                os.close(fd)
+            self.dir_fds.clear()
+        
+        self.finished.emit(success_count, error_count)
+    
+    def run_shards(self, shards_by_folder, total_files):
         success_count = 0
         error_count = 0
-        total_files = len(self.rename_tasks)
+        last_emit = 0.0
+        last_emitted = 0
+        # 每完成至少0.5%的文件才发送一次进度
+        emit_step = max(1, total_files // 200)
         
-        for i, task in enumerate(self.rename_tasks):
-            try:
-                old_path = task['filepath']
-                new_path = task['new_path']
-                
-                # 检查目标文件是否已存在，避免覆盖
-                counter = 1
-                original_new_path = new_path
-                while os.path.exists(new_path):
-                    name_part = f"{task['base_name']}_{counter}"
-                    new_path = os.path.join(os.path.dirname(old_path), f"{name_part}{task['extension']}")
-                    counter += 1
-                
-                os.rename(old_path, new_path)
+        # 留出线程给界面和EXIF预览
+        pool = QThreadPool()
+        pool.setMaxThreadCount(max(2, QThread.idealThreadCount() - 2))
+        
+        # 各分片把每个任务的结果放入队列，由当前线程统一计数并发送进度
+        results = queue.Queue()
+        for folder_tasks in shards_by_folder.values():
+            for start in range(0, len(folder_tasks), RENAME_SHARD_SIZE):
+                pool.start(RenameShard(self, folder_tasks[start:start + RENAME_SHARD_SIZE], results))
+        
+        for done in range(1, total_files + 1):
+            task, error = results.get()
+            if error is None:
                 success_count += 1
-                
-            except Exception as e:
+            else:
                 error_count += 1
-                print(f"重命名失败 {task['filepath']}: {str(e)}")
+                print(f"重命名失败 {task['filepath']}: {str(error)}")
             
-            self.progress.emit(i + 1, total_files)
+            # 限制进度信号频率，避免界面线程处理过多信号和重绘
+            now = time.monotonic()
+            if done == total_files or (done - last_emitted >= emit_step and now - last_emit > PROGRESS_EMIT_INTERVAL):
+                self.progress.emit(done, total_files)
+                last_emit = now
+                last_emitted = done
         
-        self.finished.emit(success_count, error_count)
+        pool.waitForDone()
+        return success_count, error_count
+    
+    def rename_one(self, task):
+        old_path = task['filepath']
+        try:
+            self.rename_in_folder(old_path, task['new_path'], task['folder'])
+            return
+        except FileExistsError:
+            pass
+        
+        # 目标文件意外已存在（如预览后文件夹发生变化），按序号查找可用文件名；加锁避免多个线程选中同一名称
+        with self.fallback_lock:
+            counter = 1
+            while True:
+                name_part = f"{task['base_name']}_{counter}"
+                new_path = os.path.join(task['folder'], f"{name_part}{task['extension']}")
+                counter += 1
+                if new_path in self.claimed_paths:
+                    continue
+                try:
+                    self.rename_in_folder(old_path, new_path, task['folder'])
+                except FileExistsError:
+                    continue
+                self.claimed_paths.add(new_path)
+                return
+    
+    def rename_in_folder(self, old_path, new_path, folder):
+        """重命名文件到folder中；源和目标文件夹都已打开时，通过目录描述符按文件名重命名"""
+        src_fd = self.dir_fds.get(os.path.dirname(old_path))
+        dst_fd = self.dir_fds.get(folder)
+        try_renameat2 = folder not in self.noreplace_unsupported
+        if src_fd is None or dst_fd is None:
+            done = rename_no_replace(old_path, new_path, try_renameat2=try_renameat2)
+        else:
+            done = rename_no_replace(os.path.basename(old_path), os.path.basename(new_path), src_fd, dst_fd, try_renameat2)
+        if try_renameat2 and not done and RENAMEAT2 is not None:
+            self.noreplace_unsupported.add(folder)
+
+class RenameShard(QRunnable):
+    """在线程池中重命名同一目标文件夹下的一组文件"""
+    
+    def __init__(self, worker, tasks, results):
+        super().__init__()
+        self.worker = worker
+        self.tasks = tasks
+        self.results = results
+    
+    def run(self):
+        for task in self.tasks:
+            try:
+                self.worker.rename_one(task)
+                self.results.put((task, None))
+            except Exception as e:
+                self.results.put((task, e))
+
+class PreviewTableModel(QAbstractTableModel):
+    """预览结果表格模型，由视图按需获取可见行的数据"""
+    HEADERS = ["原文件名", "拍摄时间", "相机型号", "新文件名"]
+    
+    # 背景画刷只创建一次，视图每次取数据时直接返回
+    ERROR_BRUSH = QBrush(Qt.GlobalColor.red)
+    WARNING_BRUSH = QBrush(Qt.GlobalColor.yellow)
+    SKIPPED_BRUSH = QBrush(Qt.GlobalColor.lightGray)
+    DUPLICATE_BRUSH = QBrush(Qt.GlobalColor.cyan)
+    
+    # 错误类型 -> 背景画刷，未列出的错误（含NO_HEIC_SUPPORT）使用红色
+    ERROR_BRUSHES = {
+        'NO_EXIF_TIME': WARNING_BRUSH,
+        'ALREADY_RENAMED': SKIPPED_BRUSH,
+    }
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = []
+    
+    def set_results(self, results):
+        self.beginResetModel()
+        self.results = results
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        result = self.results[index.row()]
+        column = index.column()
+        
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return result['old_name']
+            elif column == 3:
+                return result['new_name']
+            elif result['error'] == 'ALREADY_RENAMED':
+                return "已跳过"
+            elif result['error'] is not None:
+                return "读取失败"
+            elif column == 1:
+                return result['date_time']
+            else:
+                return result['camera_model']
+        
+        # 设置背景色
+        if role == Qt.ItemDataRole.BackgroundRole and column == 0:
+            if result['error'] is not None:
+                return self.ERROR_BRUSHES.get(result['error'], self.ERROR_BRUSH)
+            elif 'duplicate_of' in result:
+                return self.DUPLICATE_BRUSH
+        
+        # 重复文件提示与之内容相同的文件
+        if role == Qt.ItemDataRole.ToolTipRole and 'duplicate_of' in result:
+            return f"与 {os.path.basename(result['duplicate_of'])} 内容完全相同"
+        
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
 
 class PhotoRenamerApp(QMainWindow):
     def __init__(self):
@@ -477,6 +1014,12 @@ class PhotoRenamerApp(QMainWindow):
         self.selected_files = []
         self.preview_results = []
         self.rename_completed = False
+        # 上一次刷新重命名进度时的百分比和时间，用于合并界面更新
+        self._last_pct = -1
+        self._last_ts = 0.0
+        # 重命名确认对话框在第一次使用时创建，之后重复使用
+        self._confirm_dlg = None
+        self._duplicates_checkbox = None
         self.init_ui()
     
     def init_ui(self):
@@ -506,6 +1049,11 @@ class PhotoRenamerApp(QMainWindow):
         self.stats_label = QLabel("文件统计: 0 张图片")
         stats_layout.addWidget(self.stats_label)
         
+        # 跳过已按格式命名的文件，取消勾选可强制重新读取EXIF
+        self.skip_renamed_checkbox = QCheckBox("跳过已重命名的文件")
+        self.skip_renamed_checkbox.setChecked(True)
+        stats_layout.addWidget(self.skip_renamed_checkbox)
+        
         # 预览和重命名按钮组
         action_layout = QHBoxLayout()
         self.preview_btn = QPushButton("🔍 预览文件名")
@@ -579,9 +1127,9 @@ class PhotoRenamerApp(QMainWindow):
         table_label.setStyleSheet("font-weight: bold; font-size: 12px;")
         layout.addWidget(table_label)
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["原文件名", "拍摄时间", "相机型号", "新文件名"])
+        self.table_model = PreviewTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
@@ -620,17 +1168,13 @@ class PhotoRenamerApp(QMainWindow):
             
             self.folder_label.setText(folder_path)
             
-            # 获取所有图片文件
-            image_extensions = {
-                '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', 
-                '.cr2', '.nef', '.arw', '.dng', '.orf', '.rw2', '.pef',
-                '.heic', '.heif'
-            }
+            # 获取所有图片文件（scandir直接提供文件名和完整路径，无需额外拼接）
             files = []
-            for filename in os.listdir(folder_path):
-                name, ext = os.path.splitext(filename)
-                if ext.lower() in image_extensions:
-                    files.append(os.path.join(folder_path, filename))
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    _, dot, ext = entry.name.rpartition('.')
+                    if dot and ext.lower() in IMAGE_EXTENSIONS and entry.is_file():
+                        files.append(entry.path)
             
             self.selected_files = sorted(files)
             self.stats_label.setText(f"文件统计: {len(self.selected_files)} 张图片")
@@ -640,14 +1184,13 @@ class PhotoRenamerApp(QMainWindow):
             if 0 < len(self.selected_files) <= 500:
                 self.status_label.setText(f"状态: 找到 {len(self.selected_files)} 张图片，正在自动预览...")
                 # 延迟执行预览，让用户看到状态变化
-                from PyQt6.QtCore import QTimer
                 QTimer.singleShot(500, self.preview_names)
     
     def reset_all(self):
         """重置所有状态"""
         self.selected_files.clear()
+        self.table_model.set_results([])
         self.preview_results.clear()
-        self.table.setRowCount(0)
         self.rename_btn.setEnabled(False)
         self.preview_btn.setEnabled(True)
         self.rename_completed = False
@@ -675,13 +1218,14 @@ class PhotoRenamerApp(QMainWindow):
         
         # 创建工作线程
         self.exif_thread = QThread()
-        self.exif_worker = ExifWorker(self.selected_files)
+        self.exif_worker = ExifWorker(self.selected_files, self.skip_renamed_checkbox.isChecked())
         self.exif_worker.moveToThread(self.exif_thread)
         
         # 连接信号
         self.exif_thread.started.connect(self.exif_worker.process_files)
         self.exif_worker.finished.connect(self.on_preview_finished)
         self.exif_worker.progress.connect(self.on_preview_progress)
+        self.exif_worker.hash_progress.connect(self.on_hash_progress)
         self.exif_worker.error.connect(self.on_preview_error)
         self.exif_worker.finished.connect(self.exif_thread.quit)
         self.exif_worker.finished.connect(self.exif_worker.deleteLater)
@@ -696,6 +1240,12 @@ class PhotoRenamerApp(QMainWindow):
         self.preview_progress.setFormat(f"预览分析中... {current}/{total} ({percentage}%)")
         self.status_label.setText(f"状态: 分析中... ({current}/{total})")
     
+    def on_hash_progress(self, current, total):
+        self.preview_progress.setMaximum(total)
+        self.preview_progress.setValue(current)
+        self.preview_progress.setFormat(f"查找重复文件... {current}/{total}")
+        self.status_label.setText(f"状态: 查找内容重复的文件... ({current}/{total})")
+    
     def on_preview_error(self, error_msg):
         QMessageBox.critical(self, "错误", f"预览过程中发生错误: {error_msg}")
         self.reset_preview_ui()
@@ -707,15 +1257,20 @@ class PhotoRenamerApp(QMainWindow):
         
         # 统计成功数量
         success_count = sum(1 for r in results if r['error'] is None)
-        error_count = len(results) - success_count
+        skipped_count = sum(1 for r in results if r['error'] == 'ALREADY_RENAMED')
+        error_count = len(results) - success_count - skipped_count
         
-        self.status_label.setText(f"状态: 预览完成 - 成功 {success_count} 个, 错误 {error_count} 个")
+        self.status_label.setText(f"状态: 预览完成 - 成功 {success_count} 个, 错误 {error_count} 个, 跳过 {skipped_count} 个")
         
         # 只有在未完成重命名的情况下才启用重命名按钮
         if not self.rename_completed:
             self.rename_btn.setEnabled(success_count > 0)
             if success_count > 0:
-                self.status_label.setText(f"状态: 预览完成 - 准备重命名 {success_count} 个文件")
+                duplicate_count = sum(1 for r in results if 'duplicate_of' in r)
+                if duplicate_count:
+                    self.status_label.setText(f"状态: 预览完成 - 准备重命名 {success_count} 个文件（其中 {duplicate_count} 个内容重复）")
+                else:
+                    self.status_label.setText(f"状态: 预览完成 - 准备重命名 {success_count} 个文件")
         else:
             self.status_label.setText(f"状态: 已完成重命名 - 成功 {success_count} 个, 失败 {error_count} 个")
     
@@ -727,47 +1282,42 @@ class PhotoRenamerApp(QMainWindow):
             self.progress_container.setVisible(False)
     
     def update_preview_table(self, results):
-        self.table.setRowCount(len(results))
-        
-        # 用于生成唯一文件名
-        used_names = set()
+        # 用于生成唯一文件名：每个文件夹的现有文件名只读取一次，与本次已分配的文件名一起参与重名检测
+        used_names_by_folder = {}
+        # 每个文件夹中(基础名, 扩展名)下一个待尝试的序号
+        counters_by_folder = {}
         
-        for i, result in enumerate(results):
+        for result in results:
             if result['error'] is None:
+                folder_path = result['folder']
+                used_names = used_names_by_folder.get(folder_path)
+                if used_names is None:
+                    used_names = used_names_by_folder[folder_path] = list_folder_names(folder_path)
+                    counters_by_folder[folder_path] = {}
+                
                 # 生成唯一文件名
                 base_name = result['base_name']
                 ext = result['extension']
-                new_name = self.generate_unique_filename_preview(base_name, ext, used_names)
-                used_names.add(new_name)
-                
-                self.table.setItem(i, 0, QTableWidgetItem(result['old_name']))
-                self.table.setItem(i, 1, QTableWidgetItem(result['date_time']))
-                self.table.setItem(i, 2, QTableWidgetItem(result['camera_model']))
-                self.table.setItem(i, 3, QTableWidgetItem(new_name))
-            else:
-                self.table.setItem(i, 0, QTableWidgetItem(result['old_name']))
-                self.table.setItem(i, 1, QTableWidgetItem("读取失败"))
-                self.table.setItem(i, 2, QTableWidgetItem("读取失败"))
-                self.table.setItem(i, 3, QTableWidgetItem(result['new_name']))
-                
-                # 设置背景色
-                if result['error'] == 'NO_HEIC_SUPPORT':
-                    self.table.item(i, 0).setBackground(Qt.GlobalColor.red)
-                elif result['error'] == 'NO_EXIF_TIME':
-                    self.table.item(i, 0).setBackground(Qt.GlobalColor.yellow)
-                else:
-                    self.table.item(i, 0).setBackground(Qt.GlobalColor.red)
+                new_name = self.generate_unique_filename_preview(base_name, ext, used_names, counters_by_folder[folder_path])
+                used_names.add(folder_name_key(new_name))
+                result['new_name'] = new_name
+        
+        # 表格模型直接引用结果列表，只需重置一次，视图仅为可见行取数据
+        self.table_model.set_results(results)
     
-    def generate_unique_filename_preview(self, base_name, extension, existing_names):
+    def generate_unique_filename_preview(self, base_name, extension, existing_names, counters):
         """预览模式下的唯一文件名生成"""
         candidate = f"{base_name}{extension}"
-        if candidate not in existing_names:
+        if folder_name_key(candidate) not in existing_names:
             return candidate
         
-        counter = 1
+        # 从上次用到的序号继续查找，同名文件很多时无需每次从1开始
+        key = (base_name, extension)
+        counter = counters.get(key, 1)
         while True:
             candidate = f"{base_name}_{counter}{extension}"
-            if candidate not in existing_names:
+            if folder_name_key(candidate) not in existing_names:
+                counters[key] = counter + 1
                 return candidate
             counter += 1
     
@@ -781,39 +1331,78 @@ class PhotoRenamerApp(QMainWindow):
             QMessageBox.warning(self, "警告", "请先进行预览")
             return
         
+        candidates = [result for result in self.preview_results if result['error'] is None]
+        if not candidates:
+            QMessageBox.warning(self, "警告", "没有可重命名的文件")
+            return
+        
+        if self._confirm_dlg is None:
+            self._confirm_dlg = QMessageBox(QMessageBox.Icon.Question, "确认", "",
+                                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, self)
+            self._duplicates_checkbox = QCheckBox()
+            self._confirm_dlg.setCheckBox(self._duplicates_checkbox)
+        self._confirm_dlg.setText(f"确定要重命名 {len(candidates)} 个文件吗？\n此操作不可撤销！")
+        
+        # 预览时发现内容完全相同的照片，可以选择移动到单独的文件夹而不是加序号重命名
+        duplicate_count = sum(1 for result in candidates if 'duplicate_of' in result)
+        self._duplicates_checkbox.setText(f"将 {duplicate_count} 个内容重复的文件移动到 {DUPLICATES_FOLDER} 文件夹")
+        self._duplicates_checkbox.setChecked(False)
+        self._duplicates_checkbox.setVisible(duplicate_count > 0)
+        
+        if QMessageBox.StandardButton(self._confirm_dlg.exec()) != QMessageBox.StandardButton.Yes:
+            return
+        move_duplicates = duplicate_count > 0 and self._duplicates_checkbox.isChecked()
+        
         # 准备重命名任务
         rename_tasks = []
-        used_names = set()
+        # 每个文件夹只读取一次当前文件列表，代替逐个候选名调用os.path.exists；本次分配的文件名也加入其中
+        dir_listings = {}
+        # 每个文件夹中(基础名, 扩展名)下一个待尝试的序号，与预览相同
+        counters_by_folder = {}
         
-        for result in self.preview_results:
-            if result['error'] is None:
-                # 生成实际重命名路径
-                folder_path = os.path.dirname(result['filepath'])
-                base_name = result['base_name']
-                ext = result['extension']
-                
-                # 生成唯一文件名（基于当前文件系统状态）
-                new_name = self.generate_unique_filename_actual(base_name, ext, folder_path, used_names)
-                used_names.add(new_name)
-                
-                new_path = os.path.join(folder_path, new_name)
+        for result in candidates:
+            # 生成实际重命名路径（文件夹已在预览时计算）
+            folder_path = result['folder']
+            base_name = result['base_name']
+            ext = result['extension']
+            
+            listing = dir_listings.get(folder_path)
+            if listing is None:
+                listing = dir_listings[folder_path] = list_folder_names(folder_path)
+                counters_by_folder[folder_path] = {}
+            
+            # 生成唯一文件名（基于当前文件系统状态）；移动的重复文件也照常占用序号，其余文件的序号与预览一致
+            new_name = self.generate_unique_filename_actual(base_name, ext, listing, counters_by_folder[folder_path])
+            
+            if move_duplicates and 'duplicate_of' in result:
+                # 重复文件保留原文件名，移动到同一文件夹下的重复文件子文件夹
+                duplicates_path = os.path.join(folder_path, DUPLICATES_FOLDER)
+                try:
+                    os.makedirs(duplicates_path, exist_ok=True)
+                except OSError:
+                    pass
+                stem, old_ext = os.path.splitext(result['old_name'])
                 rename_tasks.append({
                     'filepath': result['filepath'],
-                    'new_path': new_path,
-                    'base_name': base_name,
-                    'extension': ext
+                    'folder': duplicates_path,
+                    'new_path': os.path.join(duplicates_path, result['old_name']),
+                    'base_name': stem,
+                    'extension': old_ext
                 })
-        
-        if not rename_tasks:
-            QMessageBox.warning(self, "警告", "没有可重命名的文件")
-            return
-        
-        reply = QMessageBox.question(self, "确认", 
-                                   f"确定要重命名 {len(rename_tasks)} 个文件吗？\n此操作不可撤销！",
-                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        
-        if reply != QMessageBox.StandardButton.Yes:
-            return
+                continue
+            
+            # dirname的结果通常不以分隔符结尾，直接拼接即可；为空或是根目录（如 C:/）时才使用os.path.join
+            if folder_path[-1:] in ('', '/', os.sep):
+                new_path = os.path.join(folder_path, new_name)
+            else:
+                new_path = folder_path + os.sep + new_name
+            rename_tasks.append({
+                'filepath': result['filepath'],
+                'folder': folder_path,
+                'new_path': new_path,
+                'base_name': base_name,
+                'extension': ext
+            })
         
         # 设置重命名完成标志为True，防止重复点击
         self.rename_completed = True
@@ -827,6 +1416,8 @@ class PhotoRenamerApp(QMainWindow):
         self.rename_progress.setMaximum(len(rename_tasks))
         self.rename_progress.setValue(0)
         self.status_label.setText("状态: 正在重命名文件...")
+        self._last_pct = -1
+        self._last_ts = 0.0
         
         # 创建重命名线程
         self.rename_thread = QThread()
@@ -835,29 +1426,41 @@ class PhotoRenamerApp(QMainWindow):
         
         # 连接信号
         self.rename_thread.started.connect(self.rename_worker.rename_files)
-        self.rename_worker.finished.connect(self.on_rename_finished)
+        # 工作对象位于重命名线程中，显式使用队列连接；线程退出和对象清理在on_rename_finished中完成
+        self.rename_worker.finished.connect(self.on_rename_finished, Qt.ConnectionType.QueuedConnection)
         self.rename_worker.progress.connect(self.on_rename_progress)
-        self.rename_worker.finished.connect(self.rename_thread.quit)
-        self.rename_worker.finished.connect(self.rename_worker.deleteLater)
         self.rename_thread.finished.connect(self.rename_thread.deleteLater)
         
         # 启动线程
         self.rename_thread.start()
     
     def on_rename_progress(self, current, total):
+        # 百分比没有变化且距上次刷新不久时跳过，减少进度条和标签的重绘
+        percentage = current * 100 // total
+        now = time.monotonic()
+        if percentage == self._last_pct and now - self._last_ts < PROGRESS_UI_INTERVAL and current != total:
+            return
+        self._last_pct = percentage
+        self._last_ts = now
+        
         self.rename_progress.setValue(current)
-        percentage = int((current / total) * 100)
         self.rename_progress.setFormat(f"重命名中... {current}/{total} ({percentage}%)")
         self.status_label.setText(f"状态: 重命名中... ({current}/{total})")
     
     def on_rename_finished(self, success_count, error_count):
+        # 重命名已结束，清理工作对象并结束线程
+        self.rename_worker.deleteLater()
+        self.rename_thread.quit()
+        
         self.reset_rename_ui()
-        QMessageBox.information(self, "完成", 
-                              f"🎉 重命名完成!\n成功: {success_count} 个\n失败: {error_count} 个")
         self.status_label.setText(f"状态: 🎉 重命名完成 - 成功 {success_count}, 失败 {error_count}")
         
         # 保持重命名完成状态，按钮保持禁用
         self.rename_btn.setEnabled(False)
+        
+        # 提示框延后到下一轮事件循环弹出，避免模态对话框的嵌套事件循环推迟线程的退出和清理
+        QTimer.singleShot(0, partial(QMessageBox.information, self, "完成",
+                                     f"🎉 重命名完成!\n成功: {success_count} 个\n失败: {error_count} 个"))
     
     def reset_rename_ui(self):
         self.rename_progress.setVisible(False)
@@ -865,24 +1468,31 @@ class PhotoRenamerApp(QMainWindow):
         if not self.preview_progress.isVisible():
             self.progress_container.setVisible(False)
     
-    def generate_unique_filename_actual(self, base_name, extension, folder_path, used_names):
+    def generate_unique_filename_actual(self, base_name, extension, listing, counters):
         """实际重命名时的唯一文件名生成（考虑文件系统）"""
         candidate = f"{base_name}{extension}"
-        full_path = os.path.join(folder_path, candidate)
-        
-        # 检查是否已在本次重命名中使用
-        if candidate in used_names or os.path.exists(full_path):
-            counter = 1
-            while True:
-                candidate = f"{base_name}_{counter}{extension}"
-                full_path = os.path.join(folder_path, candidate)
-                if candidate not in used_names and not os.path.exists(full_path):
-                    break
-                counter += 1
+        name_key = folder_name_key(candidate)
+        if name_key not in listing:
+            # 把选中的名称加入文件列表，供同一文件夹的后续文件检测
+            listing.add(name_key)
+            return candidate
         
-        return candidate
+        # 从上次用到的序号继续查找，同名文件很多时无需每次从1开始
+        key = (base_name, extension)
+        counter = counters.get(key, 1)
+        while True:
+            candidate = f"{base_name}_{counter}{extension}"
+            name_key = folder_name_key(candidate)
+            if name_key not in listing:
+                counters[key] = counter + 1
+                listing.add(name_key)
+                return candidate
+            counter += 1
 
 def main():
+    # 打包为可执行文件后，子进程需要通过freeze_support正确启动
+    multiprocessing.freeze_support()
+    
     app = QApplication(sys.argv)
     
     # 设置应用字体